@@ -4,11 +4,29 @@ Utilise Semantic Scholar API et un LLM (Gemini par défaut)
 """
 
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import io
+import re
 import time
-from typing import List, Dict, Optional
+import threading
+import queue
+import hashlib
+import sqlite3
+import unicodedata
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple, Iterator
 import streamlit as st
 from dataclasses import dataclass
 import google.generativeai as genai
+from google.generativeai import client as genai_client
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer, strip_accents_unicode
+import rapid_textrank
+import zstandard
 import warnings
 
 # Supprime les warnings non critiques
@@ -77,33 +95,531 @@ class Config:
     max_articles: int = 15  # Nombre maximum d'articles à récupérer
     llm_provider: str = "gemini"  # Facilite le changement futur
     gemini_model: str = "gemini-2.5-flash"  # Ou essayez "models/gemini-2.5-flash"
+    summary_workers: int = 8  # Nombre de résumés générés en parallèle
+    llm_requests_per_second: float = 1.0  # Quota de requêtes LLM (token bucket)
+    llm_cache_path: str = str(Path.home() / ".cache" / "etat_de_lart" / "llm.sqlite")
+    llm_cache_ttl: int = 7 * 24 * 3600  # Durée de validité d'une réponse en cache (secondes)
+    llm_cache_max_entries: int = 10000  # Au-delà, les entrées les moins récemment utilisées sont supprimées
+    semantic_cache_threshold: float = 0.85  # Similarité cosinus minimale pour réutiliser une réponse
+    semantic_cache_min_coverage: float = 0.8  # Part minimale de mots communs entre les deux textes
+    semantic_scholar_workers: int = 10  # Requêtes Semantic Scholar simultanées au maximum
+    max_papers_in_prompt: int = 20  # Articles transmis au LLM pour l'état de l'art complet
+    resource_max_entries: int = 16  # Clients (LLM, Semantic Scholar) conservés par clé API et modèle
+    resource_ttl: int = 3600  # Durée de conservation d'un client inutilisé (secondes)
     
 
+# ============================================================================
+# CONCURRENCE ET LIMITATION DU DÉBIT
+# ============================================================================
+
+class RateLimiter:
+    """
+    Token bucket partagé entre threads.
+    Remplace les pauses fixes entre appels : les requêtes partent dès qu'un
+    jeton est disponible, dans la limite du quota de l'API.
+    """
+    
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Bloque jusqu'à ce qu'un jeton soit disponible, puis le consomme"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Messages des threads d'arrière-plan : seul le thread du script appelle st.*,
+# les autres threads ajoutent leurs messages à la liste de leur job. La liste
+# est un attribut du thread (comme le contexte Streamlit) et non une variable
+# du module : chaque rerun réexécute le script, alors que les objets de
+# st.cache_resource gardent les globales du premier passage.
+MESSAGES_ATTR = "etat_de_lart_messages"
+
+
+def notify(level: str, message: str):
+    """
+    Affiche un message Streamlit (level: "error", "warning", "info" ou "success").
+    Dans un thread qui collecte ses messages (voir collect_messages), le message
+    est ajouté à la liste sous forme (level, message) au lieu d'être affiché.
+    """
+    messages = getattr(threading.current_thread(), MESSAGES_ATTR, None)
+    if messages is None:
+        getattr(st, level)(message)
+    else:
+        messages.append((level, message))
+
+
+def collect_messages(messages: Optional[List[Tuple[str, str]]]):
+    """Redirige les appels à notify du thread courant vers messages (None : affichage direct)."""
+    setattr(threading.current_thread(), MESSAGES_ATTR, messages)
+
+
+def message_thread_initializer():
+    """
+    Retourne un initializer de ThreadPoolExecutor qui transmet à chaque thread
+    la liste de messages du thread appelant.
+    """
+    messages = getattr(threading.current_thread(), MESSAGES_ATTR, None)
+    
+    def attach_messages():
+        collect_messages(messages)
+    
+    return attach_messages
+
+
+# ============================================================================
+# CACHE DES RÉPONSES LLM
+# ============================================================================
+
+class LLMCache:
+    """
+    Cache exact des réponses LLM sur disque (SQLite).
+    Les reruns Streamlit renvoient souvent les mêmes prompts : une réponse
+    déjà obtenue est relue localement au lieu de rappeler l'API.
+    Les réponses sont compressées avec zstd, avec un dictionnaire entraîné sur
+    les premières réponses (efficace sur les textes courts). Les dictionnaires
+    sont stockés dans la base, indexés par leur dict_id : chaque trame est
+    décompressée avec celui qui a servi à la produire.
+    """
+    
+    DICT_SAMPLES = 100  # Nombre de réponses utilisées pour entraîner le dictionnaire
+    DICT_SIZE = 1 << 16
+    
+    def __init__(self, path: str, ttl: int = 7 * 24 * 3600, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        # Décompresseurs par dict_id (0 : trame sans dictionnaire)
+        self.decompressors = {0: zstandard.ZstdDecompressor()}
+        self.compressor = zstandard.ZstdCompressor(level=3)
+        self.training = False
+        
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Connexion partagée entre threads, protégée par self.lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, response BLOB, created_at INT, accessed_at INT)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache (accessed_at, created_at)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS dictionaries (dict_id INTEGER PRIMARY KEY, data BLOB, created_at INT)"
+            )
+            self.dict_trained = self._load_latest_dictionary()
+    
+    def _store_dictionary(self, dictionary: zstandard.ZstdCompressionDict):
+        """Enregistre un dictionnaire dans la base (à appeler sous self.lock)"""
+        self.conn.execute(
+            "INSERT OR IGNORE INTO dictionaries (dict_id, data, created_at) VALUES (?, ?, ?)",
+            (dictionary.dict_id(), dictionary.as_bytes(), int(time.time()))
+        )
+    
+    def _load_latest_dictionary(self) -> bool:
+        """Compresse désormais avec le dictionnaire le plus récent de la base, s'il existe"""
+        row = self.conn.execute(
+            "SELECT data FROM dictionaries ORDER BY created_at DESC, dict_id LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return False
+        dictionary = zstandard.ZstdCompressionDict(row[0])
+        self.compressor = zstandard.ZstdCompressor(level=3, dict_data=dictionary)
+        self.decompressors[dictionary.dict_id()] = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return True
+    
+    def _decode(self, blob: bytes) -> str:
+        """
+        Décompresse une réponse.
+        Lève zstandard.ZstdError si la trame est invalide ou si son dictionnaire est introuvable.
+        """
+        dict_id = zstandard.get_frame_parameters(blob).dict_id
+        if dict_id not in self.decompressors:
+            row = self.conn.execute(
+                "SELECT data FROM dictionaries WHERE dict_id = ?", (dict_id,)
+            ).fetchone()
+            if row is None:
+                raise zstandard.ZstdError(f"dictionnaire zstd {dict_id} introuvable")
+            self.decompressors[dict_id] = zstandard.ZstdDecompressor(
+                dict_data=zstandard.ZstdCompressionDict(row[0])
+            )
+        return self.decompressors[dict_id].decompress(blob).decode('utf-8')
+    
+    def _train_dictionary(self):
+        """
+        Entraîne le dictionnaire zstd sur les DICT_SAMPLES plus anciennes réponses.
+        L'entraînement se fait hors verrou : les lectures du cache ne sont pas bloquées.
+        """
+        try:
+            with self.lock:
+                # Un autre processus a pu entraîner un dictionnaire entre-temps
+                if self._load_latest_dictionary():
+                    self.dict_trained = True
+                    return
+                rows = self.conn.execute(
+                    "SELECT response FROM cache ORDER BY created_at LIMIT ?", (self.DICT_SAMPLES,)
+                ).fetchall()
+                samples = []
+                for (blob,) in rows:
+                    try:
+                        samples.append(self._decode(blob).encode('utf-8'))
+                    except (zstandard.ZstdError, UnicodeDecodeError):
+                        continue
+            try:
+                dictionary = zstandard.train_dictionary(self.DICT_SIZE, samples)
+            except zstandard.ZstdError:
+                # Échantillons insuffisants : on reste sur la compression sans dictionnaire
+                return
+            with self.lock, self.conn:
+                self._store_dictionary(dictionary)
+                self.dict_trained = self._load_latest_dictionary()
+        finally:
+            self.training = False
+    
+    @staticmethod
+    def make_key(provider: str, model_name: str, prompt: str) -> str:
+        """Clé stable : le prompt est normalisé (NFC, espaces) et le nom du modèle mis en minuscules"""
+        prompt = unicodedata.normalize('NFC', prompt).strip()
+        raw = '\x00'.join([provider, model_name.strip().lower(), prompt])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Retourne la réponse en cache, ou None si absente, expirée ou illisible"""
+        now = int(time.time())
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                "SELECT response, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self.conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            try:
+                text = self._decode(response)
+            except (zstandard.ZstdError, UnicodeDecodeError):
+                # Entrée corrompue ou dictionnaire perdu : traitée comme absente
+                self.conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self.conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return text
+    
+    def set(self, key: str, response: str):
+        """Enregistre une réponse et applique l'éviction LRU si nécessaire"""
+        now = int(time.time())
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, self.compressor.compress(response.encode('utf-8')), now, now)
+            )
+            self.conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY accessed_at DESC, created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            train = (
+                not self.dict_trained and not self.training
+                and self.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] >= self.DICT_SAMPLES
+            )
+            if train:
+                self.training = True
+        if train:
+            self._train_dictionary()
+
+
+class SemanticCache:
+    """
+    Cache sémantique en mémoire basé sur la similarité TF-IDF.
+    Retrouve la réponse d'une requête quasi identique (reformulation, abstract
+    très proche) sans appel à une API d'embeddings.
+    Une réponse n'est réutilisée que si la similarité cosinus dépasse le seuil
+    ET si les deux textes partagent l'essentiel de leurs mots (hors mots vides).
+    """
+    
+    # Mots vides français et anglais, découpés et normalisés comme les textes (sans accents)
+    STOP_WORDS = sorted({
+        token
+        for language in ('fr', 'en')
+        for word in rapid_textrank.get_stopwords(language)
+        for token in re.findall(r"(?u)\b\w\w+\b", strip_accents_unicode(word.lower()))
+    })
+    # Taille de l'espace haché : le tableau des fréquences documentaires est copié à chaque ajout
+    N_FEATURES = 1 << 18
+    
+    def __init__(self, threshold: float = 0.85, min_coverage: float = 0.8, max_entries: int = 2000):
+        self.threshold = threshold
+        self.min_coverage = min_coverage
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        # Vectorisation sans vocabulaire figé : les mots de la requête absents du
+        # corpus comptent dans sa norme (et font baisser la similarité)
+        self.vectorizer = HashingVectorizer(
+            n_features=self.N_FEATURES, strip_accents='unicode', stop_words=self.STOP_WORDS,
+            alternate_sign=False, norm=None
+        )
+        self.analyzer = self.vectorizer.build_analyzer()
+        # Un corpus par modèle : namespace -> (ensembles de mots, réponses,
+        # TF sous-linéaires par ligne, fréquences documentaires). Chaque ajout
+        # remplace le tuple : get() lit un instantané et calcule hors verrou.
+        self.entries: Dict[str, Tuple[Tuple[set, ...], Tuple[str, ...], sparse.csr_matrix, np.ndarray]] = {}
+    
+    def _term_frequencies(self, text: str) -> sparse.csr_matrix:
+        """Comptages hachés du texte, en TF sous-linéaire (1 + log tf)"""
+        counts = self.vectorizer.transform([text])
+        counts.data = 1 + np.log(counts.data)
+        return counts
+    
+    def get(self, namespace: str, text: str) -> Optional[str]:
+        """Retourne la réponse la plus proche si elle est assez similaire, sinon None"""
+        query_words = set(self.analyzer(text))
+        if not query_words:
+            return None
+        with self.lock:
+            snapshot = self.entries.get(namespace)
+        if snapshot is None:
+            return None
+        word_sets, responses, counts, doc_freq = snapshot
+        
+        # IDF lissé (comme TfidfTransformer), recalculé à partir des fréquences documentaires
+        # pour les seules colonnes utiles : celles du corpus et celles de la requête
+        n = counts.shape[0]
+        corpus = counts.copy()
+        corpus.data = corpus.data * (np.log((1 + n) / (1 + doc_freq[corpus.indices])) + 1)
+        query = self._term_frequencies(text)
+        query.data = query.data * (np.log((1 + n) / (1 + doc_freq[query.indices])) + 1)
+        norms = np.sqrt(np.asarray(corpus.multiply(corpus).sum(axis=1)).ravel())
+        similarities = (corpus @ query.T).toarray().ravel() / (norms * np.sqrt(query.multiply(query).sum()))
+        best = similarities.argmax()
+        if similarities[best] < self.threshold:
+            return None
+        # Chaque texte doit couvrir l'essentiel des mots de l'autre
+        common = len(query_words & word_sets[best])
+        if common < self.min_coverage * max(len(query_words), len(word_sets[best])):
+            return None
+        return responses[best]
+    
+    def set(self, namespace: str, text: str, response: str):
+        """Ajoute une entrée au corpus (les plus anciennes sont retirées au-delà de max_entries)"""
+        words = set(self.analyzer(text))
+        if not words:
+            return
+        row = self._term_frequencies(text)
+        with self.lock:
+            snapshot = self.entries.get(namespace)
+            if snapshot is None:
+                word_sets, responses = (), ()
+                counts = sparse.csr_matrix((0, self.N_FEATURES))
+                doc_freq = np.zeros(self.N_FEATURES, dtype=np.int32)
+            else:
+                word_sets, responses, counts, doc_freq = snapshot
+            # Copie : les instantanés déjà lus par get() restent inchangés
+            doc_freq = doc_freq.copy()
+            doc_freq[row.indices] += 1
+            counts = sparse.vstack([counts, row], format='csr')
+            word_sets += (words,)
+            responses += (response,)
+            if len(responses) > self.max_entries:
+                doc_freq[counts.indices[counts.indptr[0]:counts.indptr[1]]] -= 1
+                counts = counts[1:]
+                word_sets, responses = word_sets[1:], responses[1:]
+            self.entries[namespace] = (word_sets, responses, counts, doc_freq)
+
+
+class CacheLayer:
+    """
+    Combine le cache exact et, optionnellement, le cache sémantique.
+    Le cache exact est toujours consulté en premier.
+    """
+    
+    def __init__(self, exact: LLMCache, semantic: Optional[SemanticCache] = None):
+        self.exact = exact
+        self.semantic = semantic
+    
+    def get(self, key: str, namespace: str, semantic_text: Optional[str] = None) -> Optional[str]:
+        return self.lookup(key, namespace, semantic_text)[0]
+    
+    def lookup(self, key: str, namespace: str,
+               semantic_text: Optional[str] = None) -> Tuple[Optional[str], str]:
+        """Comme get, mais indique aussi le cache qui a répondu ('exact', 'semantic' ou '')"""
+        response = self.exact.get(key)
+        if response is not None:
+            return response, 'exact'
+        if self.semantic is not None and semantic_text:
+            response = self.semantic.get(namespace, semantic_text)
+            if response is not None:
+                return response, 'semantic'
+        return None, ''
+    
+    def set(self, key: str, response: str, namespace: str, semantic_text: Optional[str] = None):
+        self.exact.set(key, response)
+        if self.semantic is not None and semantic_text:
+            self.semantic.set(namespace, semantic_text, response)
+
+
 # ============================================================================
 # CLASSE LLM ABSTRACTION (facilite le changement de LLM)
 # ============================================================================
 
+# genai.configure modifie la clé API de tout le processus : la configuration et
+# la création du client d'un modèle doivent se faire sans être interrompues
+GENAI_CONFIGURE_LOCK = threading.Lock()
+
+
 class LLMProvider:
     """
     Classe abstraite pour interagir avec différents LLM.
     Permet de changer facilement de provider (Gemini, GPT, Claude, etc.)
     """
     
-    def __init__(self, api_key: str, provider: str = "gemini", model_name: str = "gemini-2.5-flash"):
+    def __init__(self, api_key: str, provider: str = "gemini", model_name: str = "gemini-2.5-flash",
+                 requests_per_second: float = 1.0, cache: Optional[CacheLayer] = None):
         self.provider = provider
         self.api_key = api_key
+        self.model_name = model_name
+        self.cache = cache
+        # Partagé par tous les threads qui appellent generate()
+        self.rate_limiter = RateLimiter(requests_per_second)
+        # Appels en cours, par clé de prompt : les doublons simultanés attendent le premier
+        self.in_flight: Dict[str, Future] = {}
+        self.in_flight_lock = threading.Lock()
         
         if provider == "gemini":
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel(model_name)
+            with GENAI_CONFIGURE_LOCK:
+                genai.configure(api_key=api_key)
+                self.model = genai.GenerativeModel(model_name)
+                # Sans cela, le modèle ne crée son client qu'au premier appel, avec la
+                # clé configurée à ce moment-là (éventuellement celle d'une autre session).
+                # _client est un attribut privé (google-generativeai 0.8, voir requirements.txt) :
+                # s'il disparaît, on refuse de continuer plutôt que de partager une clé.
+                if getattr(self.model, '_client', False) is not None:
+                    raise RuntimeError(
+                        "google-generativeai : GenerativeModel._client introuvable, "
+                        "impossible de lier la clé API au modèle"
+                    )
+                self.model._client = genai_client.get_default_generative_client()
     
-    def generate(self, prompt: str) -> str:
+    def generate(self, prompt: str, semantic_text: Optional[str] = None) -> str:
         """
         Génère une réponse à partir d'un prompt.
+        Consulte d'abord le cache ; seules les réponses non vides y sont enregistrées.
+        Si semantic_text est fourni (partie variable du prompt), une requête quasi
+        identique déjà traitée peut aussi être servie par le cache sémantique.
+        Des appels identiques lancés en parallèle ne produisent qu'une requête au LLM.
+        """
+        return self.generate_with_source(prompt, semantic_text)[0]
+    
+    def get_cached(self, key: str) -> Optional[str]:
+        """Lit une réponse du cache exact sous une clé choisie par l'appelant"""
+        if self.cache is None:
+            return None
+        return self.cache.exact.get(key)
+    
+    def set_cached(self, key: str, response: str):
+        """Enregistre une réponse dans le cache exact sous une clé choisie par l'appelant"""
+        if self.cache is not None:
+            self.cache.exact.set(key, response)
+    
+    def generate_with_source(self, prompt: str, semantic_text: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Comme generate, mais retourne aussi l'origine de la réponse :
+        'exact' ou 'semantic' (cache), 'model' (appel au LLM).
+        Une réponse 'semantic' vient d'un autre prompt, jugé proche.
+        """
+        key = LLMCache.make_key(self.provider, self.model_name, prompt)
+        namespace = f"{self.provider}:{self.model_name}"
+        if self.cache is not None:
+            cached, source = self.cache.lookup(key, namespace, semantic_text)
+            if cached is not None:
+                return cached, source
+        
+        # Si le même prompt est déjà en cours de génération, attend son résultat
+        with self.in_flight_lock:
+            future = self.in_flight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self.in_flight[key] = future
+        if not is_owner:
+            return future.result()
+        
+        try:
+            # Un appel identique a pu se terminer entre la lecture du cache et
+            # l'enregistrement dans in_flight : sa réponse est alors déjà en cache
+            if self.cache is not None:
+                cached = self.cache.exact.get(key)
+                if cached is not None:
+                    future.set_result((cached, 'exact'))
+                    return cached, 'exact'
+            response = self._call_model(prompt)
+            if self.cache is not None and response and response.strip():
+                self.cache.set(key, response, namespace, semantic_text)
+            future.set_result((response, 'model'))
+            return response, 'model'
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.in_flight_lock:
+                del self.in_flight[key]
+    
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Génère une réponse en flux : les morceaux de texte sont produits dès leur arrivée.
+        Une réponse déjà en cache est renvoyée d'un bloc ; la réponse complète est
+        mise en cache à la fin du flux.
+        Une erreur du LLM est propagée à l'appelant : un flux interrompu ne doit
+        être ni mis en cache ni présenté comme une réponse complète.
+        """
+        key = LLMCache.make_key(self.provider, self.model_name, prompt)
+        namespace = f"{self.provider}:{self.model_name}"
+        if self.cache is not None:
+            cached = self.cache.get(key, namespace)
+            if cached is not None:
+                yield cached
+                return
+        
+        chunks = []
+        if self.provider == "gemini":
+            self.rate_limiter.acquire()
+            response = self.model.generate_content(prompt, stream=True)
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Morceau sans texte (filtré ou vide)
+                    continue
+                chunks.append(text)
+                yield text
+        # Ajouter d'autres providers ici (GPT, Claude, etc.)
+        else:
+            raise ValueError(f"Provider {self.provider} non supporté")
+        
+        response = ''.join(chunks)
+        if self.cache is not None and response.strip():
+            self.cache.set(key, response, namespace)
+    
+    def _call_model(self, prompt: str) -> str:
+        """
+        Appelle le LLM sans passer par le cache.
         Cette méthode peut être adaptée pour d'autres LLM.
         """
         try:
             if self.provider == "gemini":
+                self.rate_limiter.acquire()
                 response = self.model.generate_content(prompt)
                 # Vérification de la réponse
                 if hasattr(response, 'text'):
@@ -112,16 +628,16 @@ class LLMProvider:
                     # Parfois la réponse est dans parts
                     return ''.join([part.text for part in response.parts])
                 else:
-                    st.error("⚠️ Le LLM a retourné une réponse vide ou bloquée")
+                    notify("error", "⚠️ Le LLM a retourné une réponse vide ou bloquée")
                     return ""
             # Ajouter d'autres providers ici (GPT, Claude, etc.)
             else:
                 raise ValueError(f"Provider {self.provider} non supporté")
         except Exception as e:
-            st.error(f"Erreur LLM: {str(e)}")
+            notify("error", f"Erreur LLM: {str(e)}")
             # Affiche plus d'infos pour déboguer
             if hasattr(e, 'message'):
-                st.error(f"Détails: {e.message}")
+                notify("error", f"Détails: {e.message}")
             return ""
 
 
@@ -132,6 +648,19 @@ class LLMProvider:
 class SemanticScholarAPI:
     """Gère les interactions avec l'API Semantic Scholar"""
     
+    # Champs demandés pour la recherche
+    SEARCH_FIELDS = 'title,abstract,authors,year,citationCount,publicationDate,url,paperId,tldr,openAccessPdf'
+    # Champs demandés pour les détails d'un article (requête unitaire ou par lot)
+    DETAILS_FIELDS = 'title,abstract,authors,year,citationCount,references,citations,url,tldr,openAccessPdf,externalIds'
+    # Champs préchargés pendant la lecture des résumés : les références servent à
+    # indiquer au LLM quels articles sélectionnés en citent d'autres
+    PREFETCH_FIELDS = 'references.paperId'
+    # Nombre maximal d'identifiants acceptés par /paper/batch
+    BATCH_SIZE = 500
+    # Mots vides anglais et français, pour reconnaître la langue de la question
+    EN_STOP_WORDS = frozenset(rapid_textrank.get_stopwords('en'))
+    FR_STOP_WORDS = frozenset(rapid_textrank.get_stopwords('fr'))
+    
     def __init__(self, config: Config, api_key: Optional[str] = None):
         self.config = config
         self.base_url = config.semantic_scholar_api_url
@@ -141,8 +670,47 @@ class SemanticScholarAPI:
         # Si une clé API est fournie, l'ajouter aux headers
         if self.api_key:
             self.headers['x-api-key'] = self.api_key
+        
+        # Session partagée : connexions HTTPS réutilisées (keep-alive) et relances automatiques
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET', 'POST'],  # /paper/batch est une lecture
+            raise_on_status=False  # La dernière réponse est traitée par raise_for_status()
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry))
+        # Borne le nombre de requêtes simultanées, tous threads confondus
+        self.request_slots = threading.Semaphore(config.semantic_scholar_workers)
+    
+    @classmethod
+    def is_english(cls, text: str) -> bool:
+        """
+        Vrai si le texte contient plus de mots vides anglais que français, ou aucun
+        mot vide français (requête par mots-clés, ex. "reinforcement learning robotics").
+        """
+        words = re.findall(r"\w+", text.lower())
+        english = sum(word in cls.EN_STOP_WORDS for word in words)
+        french = sum(word in cls.FR_STOP_WORDS for word in words)
+        return english > french or french == 0
     
     def extract_keywords(self, question: str, llm: LLMProvider) -> List[str]:
+        """
+        Extrait les mots-clés pertinents de la question avec TextRank (local, sans appel réseau).
+        TextRank reprend les mots de la question : il n'est utilisé que pour une question
+        en anglais, la langue de la quasi-totalité des articles de Semantic Scholar.
+        Sinon, ou si TextRank trouve moins de 2 mots-clés, le LLM extrait des mots-clés en anglais.
+        """
+        if self.is_english(question):
+            phrases = rapid_textrank.extract_keywords(question, top_n=5, language='en')
+            keywords = [p.text.strip() for p in phrases if p.text.strip()]
+            if len(keywords) >= 2:
+                return keywords
+        
+        return self.extract_keywords_llm(question, llm)
+    
+    def extract_keywords_llm(self, question: str, llm: LLMProvider) -> List[str]:
         """
         Utilise le LLM pour extraire les mots-clés pertinents de la question.
         Améliore la précision de la recherche sur Semantic Scholar.
@@ -158,114 +726,187 @@ class SemanticScholarAPI:
         """
         
         try:
-            keywords_text = llm.generate(prompt)
+            keywords_text = llm.generate(prompt, semantic_text=question)
             if not keywords_text or keywords_text.strip() == "":
                 # Fallback : utilise la question directement
-                st.warning("⚠️ Impossible d'extraire les mots-clés, utilisation de la question complète")
+                notify("warning", "⚠️ Impossible d'extraire les mots-clés, utilisation de la question complète")
                 return [question]
             # Nettoie et sépare les mots-clés
             keywords = [k.strip() for k in keywords_text.split(',')]
             return keywords[:5]  # Limite à 5 mots-clés
         except Exception as e:
-            st.error(f"Erreur lors de l'extraction des mots-clés: {str(e)}")
+            notify("error", f"Erreur lors de l'extraction des mots-clés: {str(e)}")
             # Fallback : utilise la question directement
             return [question]
     
-    def search_papers(self, query: str, limit: int = 15) -> List[Dict]:
+    def search_papers(self, query: str, limit: int = 15) -> Optional[List[Dict]]:
         """
         Recherche des articles sur Semantic Scholar.
-        Retourne une liste d'articles avec leurs métadonnées.
+        Retourne une liste d'articles avec leurs métadonnées, ou None si la
+        requête a échoué (une liste vide signifie : aucun résultat).
         """
-        url = f"{self.base_url}/paper/search"
-        params = {
-            'query': query,
-            'limit': limit,
-            'fields': 'title,abstract,authors,year,citationCount,publicationDate,url,paperId,tldr,openAccessPdf'
-        }
-        
         try:
-            response = requests.get(url, params=params, headers=self.headers)
-            response.raise_for_status()
-            data = response.json()
+            data = _cached_search(self, query, limit, self.api_key)
             
             # Affiche des infos sur l'utilisation de la clé API
             if self.api_key:
-                st.success("✅ Clé API Semantic Scholar utilisée")
+                notify("success", "✅ Clé API Semantic Scholar utilisée")
             else:
-                st.info("ℹ️ Recherche sans clé API (limites réduites)")
+                notify("info", "ℹ️ Recherche sans clé API (limites réduites)")
             
             return data.get('data', [])
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 429:
-                st.error("⚠️ Limite de taux atteinte. Veuillez patienter quelques secondes et réessayer.")
-                st.info("💡 Astuce : Réduisez le nombre d'articles ou attendez 1 minute avant de relancer.")
+                notify("error", "⚠️ Limite de taux atteinte. Veuillez patienter quelques secondes et réessayer.")
+                notify("info", "💡 Astuce : Réduisez le nombre d'articles ou attendez 1 minute avant de relancer.")
             else:
-                st.error(f"Erreur API Semantic Scholar: {str(e)}")
-            return []
-        except requests.exceptions.RequestException as e:
-            st.error(f"Erreur API Semantic Scholar: {str(e)}")
-            return []
+                notify("error", f"Erreur API Semantic Scholar: {str(e)}")
+            return None
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            notify("error", f"Erreur API Semantic Scholar: {str(e)}")
+            return None
     
-    def get_paper_details(self, paper_id: str) -> Optional[Dict]:
+    def get_paper_details(self, paper_id: str, fields: Optional[str] = None) -> Optional[Dict]:
         """
         Récupère les détails complets d'un article spécifique.
         Utilisé pour obtenir plus d'informations si nécessaire.
+        fields remplace au besoin les champs par défaut (DETAILS_FIELDS).
         """
-        url = f"{self.base_url}/paper/{paper_id}"
-        params = {
-            'fields': 'title,abstract,authors,year,citationCount,references,citations,url,tldr,openAccessPdf,externalIds'
-        }
-        
         try:
-            response = requests.get(url, params=params, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            st.error(f"Erreur lors de la récupération de l'article: {str(e)}")
+            return _cached_paper_details(self, paper_id, fields or self.DETAILS_FIELDS, self.api_key)
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            notify("error", f"Erreur lors de la récupération de l'article: {str(e)}")
             return None
     
-    def fetch_paper_content(self, paper: Dict) -> Optional[str]:
+    def get_papers_batch(self, ids: List[str], fields: Optional[str] = None,
+                         fallback: bool = True) -> List[Dict]:
         """
-        Tente de récupérer le contenu complet d'un article pour extraire un résumé.
-        Essaie plusieurs sources : TLDR de Semantic Scholar, PDF Open Access, etc.
+        Récupère les détails de plusieurs articles en une seule requête (/paper/batch).
+        Les identifiants inconnus de Semantic Scholar sont ignorés.
+        fields remplace au besoin les champs par défaut (DETAILS_FIELDS) ; sans
+        fallback, un lot en échec est ignoré au lieu d'être récupéré article par article.
         """
-        paper_id = paper.get('paperId')
-        if not paper_id:
-            return None
-        
-        # Récupère les détails complets incluant TLDR et PDF
-        details = self.get_paper_details(paper_id)
-        if not details:
-            return None
-        
-        # 1. Essaye d'abord le TLDR (résumé automatique de Semantic Scholar)
-        if details.get('tldr') and details['tldr'].get('text'):
-            return details['tldr']['text']
-        
-        # 2. Vérifie si un PDF Open Access est disponible
-        open_access = details.get('openAccessPdf')
-        if open_access and open_access.get('url'):
-            st.info(f"📄 PDF Open Access disponible pour: {paper.get('title', '')[:50]}...")
-            return f"PDF disponible à: {open_access['url']}"
-        
-        return None
+        fields = fields or self.DETAILS_FIELDS
+        papers = []
+        for start in range(0, len(ids), self.BATCH_SIZE):
+            chunk = tuple(ids[start:start + self.BATCH_SIZE])
+            try:
+                # La réponse suit l'ordre des ids, avec null pour les articles introuvables
+                papers.extend(p for p in _cached_papers_batch(self, chunk, fields, self.api_key) if p)
+            except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+                if not fallback:
+                    continue
+                # Repli : requêtes unitaires en parallèle pour ce lot
+                notify("warning", f"⚠️ Requête groupée impossible ({str(e)}), récupération article par article")
+                papers.extend(self.get_papers_parallel(chunk, fields))
+        return papers
+    
+    def get_papers_parallel(self, ids: List[str], fields: Optional[str] = None) -> List[Dict]:
+        """
+        Récupère les détails de plusieurs articles avec get_paper_details, en parallèle.
+        Utilisé quand l'endpoint /paper/batch n'est pas disponible.
+        """
+        with ThreadPoolExecutor(
+            max_workers=self.config.semantic_scholar_workers,
+            initializer=message_thread_initializer()
+        ) as executor:
+            results = executor.map(lambda paper_id: self.get_paper_details(paper_id, fields), ids)
+        return [p for p in results if p]
+
+
+# ============================================================================
+# CACHE DES REQUÊTES SEMANTIC SCHOLAR
+# ============================================================================
+# Streamlit réexécute tout le script à chaque interaction : ces fonctions
+# conservent les réponses JSON entre les reruns. La clé de cache est formée
+# des arguments, sauf ceux préfixés par "_" (l'instance, non hachable) ; la
+# clé API est passée en dernier pour séparer appels authentifiés et anonymes.
+# Les erreurs HTTP sont levées et ne sont donc jamais mises en cache.
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _cached_search(_api: SemanticScholarAPI, query: str, limit: int, api_key: Optional[str]) -> Dict:
+    """Requête /paper/search"""
+    params = {
+        'query': query,
+        'limit': limit,
+        'fields': _api.SEARCH_FIELDS
+    }
+    with _api.request_slots:
+        response = _api.session.get(f"{_api.base_url}/paper/search", params=params, headers=_api.headers)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _cached_paper_details(_api: SemanticScholarAPI, paper_id: str, fields: str,
+                          api_key: Optional[str]) -> Dict:
+    """Requête /paper/{paper_id}"""
+    params = {
+        'fields': fields
+    }
+    with _api.request_slots:
+        response = _api.session.get(f"{_api.base_url}/paper/{paper_id}", params=params, headers=_api.headers)
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False)
+def _cached_papers_batch(_api: SemanticScholarAPI, ids: Tuple[str, ...], fields: str,
+                         api_key: Optional[str]) -> List[Optional[Dict]]:
+    """Requête POST /paper/batch"""
+    params = {
+        'fields': fields
+    }
+    with _api.request_slots:
+        response = _api.session.post(
+            f"{_api.base_url}/paper/batch", params=params, json={'ids': list(ids)}, headers=_api.headers
+        )
+    response.raise_for_status()
+    return orjson.loads(response.content)
 
 
 # ============================================================================
 # GÉNÉRATEUR D'ÉTAT DE L'ART
 # ============================================================================
 
+def format_authors(authors: List[Dict]) -> str:
+    """Trois premiers auteurs, suivis de « et al. » s'il y en a davantage"""
+    names = ', '.join(a.get('name', '') for a in authors[:3])
+    return names + " et al." if len(authors) > 3 else names
+
+
 class LiteratureReviewGenerator:
     """Génère l'état de l'art à partir des articles sélectionnés"""
     
-    def __init__(self, llm: LLMProvider):
+    def __init__(self, llm: LLMProvider, max_papers_in_prompt: int = 20):
         self.llm = llm
+        self.max_papers_in_prompt = max_papers_in_prompt
+    
+    def summary_cache_key(self, paper: Dict) -> Optional[str]:
+        """
+        Clé de cache du résumé d'un article : paperId, modèle et empreinte du texte résumé.
+        Retourne None si l'article n'a pas d'identifiant.
+        """
+        paper_id = paper.get('paperId')
+        if not paper_id:
+            return None
+        content = paper.get('abstract') or (paper.get('tldr') or {}).get('text') or ''
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        raw = f"summary:{paper_id}:{self.llm.model_name.strip().lower()}:{content_hash}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
     
     def summarize_paper(self, paper: Dict, semantic_api: 'SemanticScholarAPI') -> str:
         """
         Génère un résumé court d'un article pour la liste de validation.
         Tente d'abord d'utiliser l'abstract, puis le TLDR (déjà récupéré lors de la recherche).
+        Un article déjà résumé (même paperId, même texte) est relu depuis le cache.
         """
+        key = self.summary_cache_key(paper)
+        if key:
+            cached = self.llm.get_cached(key)
+            if cached is not None:
+                return cached
+        
         title = paper.get('title', 'Sans titre')
         abstract = paper.get('abstract', None)
         year = paper.get('year', 'N/A')
@@ -281,8 +922,11 @@ class LiteratureReviewGenerator:
             Résumé: {abstract[:1000]}
             """
             
-            summary = self.llm.generate(prompt)
+            summary, source = self.llm.generate_with_source(prompt, semantic_text=f"{title}\n{abstract[:1000]}")
             if summary and summary.strip():
+                # Une réponse du cache sémantique vient d'un autre article : pas sous ce paperId
+                if key and source != 'semantic':
+                    self.llm.set_cached(key, summary)
                 return summary
             return abstract[:300] + "..."
         
@@ -296,8 +940,10 @@ class LiteratureReviewGenerator:
             Titre: {title}
             TLDR: {tldr_text}
             """
-            summary = self.llm.generate(prompt)
+            summary, source = self.llm.generate_with_source(prompt, semantic_text=f"{title}\n{tldr_text}")
             if summary and summary.strip():
+                if key and source != 'semantic':
+                    self.llm.set_cached(key, summary)
                 return summary
             return tldr_text
         
@@ -312,40 +958,55 @@ class LiteratureReviewGenerator:
             return f"⚠️ Résumé non disponible. Consultez l'article complet: {paper_url}"
         return f"⚠️ Résumé non disponible pour cet article."
     
-    def generate_full_review(self, papers: List[Dict], question: str) -> str:
+    def build_review_prompt(self, papers: List[Dict], question: str,
+                            author_strs: Optional[List[str]] = None,
+                            references: Optional[Dict[str, List[str]]] = None) -> str:
         """
-        Génère l'état de l'art complet (environ 2 pages).
-        Structure: Introduction, Travaux existants, Limitations, Perspectives.
+        Construit le prompt de l'état de l'art complet à partir des articles sélectionnés.
+        author_strs contient, si fourni, les auteurs déjà formatés de chaque article ;
+        references, les paperId cités par chaque article (voir start_prefetch).
         """
-        # Prépare les informations sur les articles
-        papers_info = []
-        for i, paper in enumerate(papers, 1):
-            authors_list = paper.get('authors', [])
-            authors = ', '.join([a.get('name', '') for a in authors_list[:3]])
-            if len(authors_list) > 3:
-                authors += " et al."
-            
-            # Utilise l'abstract, ou le TLDR, ou le summary généré
-            abstract = paper.get('abstract', None)
-            if abstract and abstract.strip():
-                abstract_text = abstract[:800]
-            elif paper.get('tldr') and paper.get('tldr').get('text'):
-                abstract_text = paper['tldr']['text']
-            else:
-                # Utilise le summary qui a été généré par summarize_paper
-                abstract_text = paper.get('summary', 'Non disponible')[:800]
+        references = references or {}
+        if author_strs is None:
+            author_strs = [format_authors(p.get('authors') or []) for p in papers]
+        
+        # Dédoublonne par paperId (ordre conservé) et borne le nombre d'articles :
+        # un prompt plus court est plus rapide, moins coûteux et n'est pas tronqué
+        unique_papers = {}
+        for paper, authors in zip(papers, author_strs):
+            unique_papers.setdefault(paper.get('paperId') or id(paper), (paper, authors))
+        entries = list(unique_papers.values())
+        if len(entries) > self.max_papers_in_prompt:
+            notify("info", f"ℹ️ Seuls les {self.max_papers_in_prompt} premiers articles sélectionnés sont utilisés")
+            entries = entries[:self.max_papers_in_prompt]
+        
+        # Numéro de chaque article dans le prompt, pour les citations entre articles
+        numbers = {paper.get('paperId'): i for i, (paper, _) in enumerate(entries, 1) if paper.get('paperId')}
+        
+        # Prépare les informations sur les articles en un seul passage
+        buffer = io.StringIO()
+        for i, (paper, authors) in enumerate(entries, 1):
+            # Utilise l'abstract, ou le TLDR, ou le summary généré par summarize_paper
+            tldr_text = (paper.get('tldr') or {}).get('text')
+            abstract_text = (
+                (paper.get('abstract') or '').strip() or tldr_text or paper.get('summary') or 'Non disponible'
+            )[:800]
             
-            info = f"""
+            if i > 1:
+                buffer.write("\n\n")
+            buffer.write(f"""
             Article {i}:
             - Titre: {paper.get('title', 'N/A')}
             - Auteurs: {authors}
             - Année: {paper.get('year', 'N/A')}
             - Citations: {paper.get('citationCount', 0)}
             - Résumé: {abstract_text}
-            """
-            papers_info.append(info)
+            """)
+            cited = sorted({numbers[ref] for ref in references.get(paper.get('paperId'), []) if ref in numbers} - {i})
+            if cited:
+                buffer.write(f"- Cite les articles: {', '.join(map(str, cited))}\n")
         
-        papers_text = "\n\n".join(papers_info)
+        papers_text = buffer.getvalue()
         
         prompt = f"""
         Tu es un chercheur expert. Rédige un état de l'art scientifique complet et structuré 
@@ -382,19 +1043,264 @@ class LiteratureReviewGenerator:
         - Style: académique mais accessible
         - Synthèse: regroupe les travaux similaires
         - Citations: mentionne auteurs et années
+        - Filiation: appuie-toi sur les liens « Cite les articles » pour relier les travaux entre eux
         - Objectivité: présente les forces ET faiblesses
         
         Rédige maintenant l'état de l'art complet.
         """
         
-        review = self.llm.generate(prompt)
+        return prompt
+    
+    def stream_full_review(self, papers: List[Dict], question: str,
+                           author_strs: Optional[List[str]] = None,
+                           references: Optional[Dict[str, List[str]]] = None) -> Iterator[str]:
+        """
+        Génère l'état de l'art complet (environ 2 pages), en flux, à passer à st.write_stream.
+        Structure: Introduction, Travaux existants, Limitations, Perspectives.
+        Le texte s'affiche au fur et à mesure de sa génération ; une erreur du LLM
+        est propagée pour que l'appelant ne présente pas un texte partiel comme réussi.
+        """
+        return self.llm.generate_stream(self.build_review_prompt(papers, question, author_strs, references))
+
+
+# ============================================================================
+# PIPELINE DE RECHERCHE (ARRIÈRE-PLAN)
+# ============================================================================
+
+def run_pipeline(job: Dict, question: str, config: Config,
+                 semantic_api: SemanticScholarAPI, review_generator: LiteratureReviewGenerator):
+    """
+    Extraction des mots-clés, recherche et résumés, exécutés dans un thread.
+    L'avancement est écrit dans `job` et chaque étape est signalée sur
+    job['events'] pour que l'interface se redessine (voir follow_pipeline).
+    Le thread n'a pas accès à Streamlit : les messages (notify) sont ajoutés
+    à job['messages'] et affichés par follow_pipeline.
+    """
+    def update(**changes):
+        job.update(changes)
+        job['events'].put(True)
+    
+    collect_messages(job['messages'])
+    try:
+        update(status="🔎 Extraction des mots-clés...")
+        keywords = semantic_api.extract_keywords(question, review_generator.llm)
+        update(keywords=keywords, status="📖 Recherche d'articles sur Semantic Scholar...")
+        
+        # Recherche avec les mots-clés combinés
+        papers = semantic_api.search_papers(' '.join(keywords), limit=config.max_articles)
+        if papers == []:
+            # Aucun résultat (et non une erreur de l'API, qu'une nouvelle requête
+            # aggraverait) : le LLM peut reformuler les mots-clés de TextRank
+            llm_keywords = semantic_api.extract_keywords_llm(question, review_generator.llm)
+            if llm_keywords != keywords:
+                update(keywords=llm_keywords, status="📖 Nouvelle recherche avec les mots-clés du LLM...")
+                papers = semantic_api.search_papers(' '.join(llm_keywords), limit=config.max_articles)
+        if papers is None:
+            # L'erreur de l'API est déjà dans job['messages']
+            update(error="La recherche Semantic Scholar a échoué. Réessayez dans quelques instants.")
+            return
+        if not papers:
+            update(error="Aucun article trouvé. Essayez de reformuler votre question.")
+            return
+        if job['cancel'].is_set():
+            return
         
-        # Vérification de la génération
-        if not review or review.strip() == "":
-            st.error("⚠️ La génération de l'état de l'art a échoué")
-            return "Erreur lors de la génération. Veuillez réessayer ou changer de modèle LLM."
+        # Génère les résumés en parallèle (appels LLM limités par le token bucket)
+        update(papers=papers, status="✍️ Génération des résumés...")
+        with ThreadPoolExecutor(
+            max_workers=config.summary_workers,
+            initializer=message_thread_initializer()
+        ) as executor:
+            futures = {
+                executor.submit(review_generator.summarize_paper, paper, semantic_api): paper
+                for paper in papers
+            }
+            for future in as_completed(futures):
+                if job['cancel'].is_set():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    return
+                paper = futures[future]
+                try:
+                    paper['summary'] = future.result()
+                except Exception as e:
+                    notify(
+                        "warning",
+                        f"⚠️ Erreur lors de la génération du résumé pour '{paper.get('title', 'Article')[:50]}...': {str(e)}"
+                    )
+                    paper['summary'] = f"Erreur de génération. Consultez l'article: {paper.get('url', 'URL non disponible')}"
+                update(summarized=job['summarized'] + 1)
+    except Exception as e:
+        update(error=f"Erreur lors de la recherche : {str(e)}")
+    finally:
+        update(done=True)
+
+
+def start_pipeline(question: str, config: Config, semantic_api: SemanticScholarAPI,
+                   review_generator: LiteratureReviewGenerator) -> Dict:
+    """
+    Lance run_pipeline dans un thread d'arrière-plan.
+    Retourne l'état partagé du pipeline, à conserver dans st.session_state.
+    """
+    job = {
+        'events': queue.Queue(),
+        'cancel': threading.Event(),
+        'status': "",
+        'keywords': [],
+        'papers': [],
+        'summarized': 0,
+        'messages': [],
+        'error': None,
+        'done': False
+    }
+    thread = threading.Thread(
+        target=run_pipeline,
+        args=(job, question, config, semantic_api, review_generator),
+        daemon=True
+    )
+    thread.start()
+    return job
+
+
+def store_papers(papers: List[Dict]):
+    """
+    Enregistre les articles dans st.session_state, avec les champs affichés
+    précalculés en colonnes parallèles (titres, années, auteurs formatés) :
+    les reruns n'ont plus qu'à les relire.
+    """
+    st.session_state.papers = papers
+    st.session_state.titles = [p.get('title') or 'Sans titre' for p in papers]
+    st.session_state.years = [p.get('year') or 'N/A' for p in papers]
+    st.session_state.author_strs = [format_authors(p.get('authors') or []) for p in papers]
+
+
+def show_messages(messages: List[Tuple[str, str]]):
+    """Affiche les messages (level, message) collectés par le pipeline."""
+    for level, message in messages:
+        getattr(st, level)(message)
+
+
+def start_prefetch(semantic_api: SemanticScholarAPI, papers: List[Dict]) -> Dict[str, List[str]]:
+    """
+    Précharge en arrière-plan les références des articles pendant que l'utilisateur
+    lit les résumés. Retourne le dictionnaire (paperId -> paperId cités) que le
+    thread remplit ; il reste vide si le préchargement échoue ou n'est pas terminé.
+    """
+    references = {}
+    ids = [p['paperId'] for p in papers if p.get('paperId')]
+    
+    def prefetch():
+        # Préchargement facultatif : ses messages ne sont pas affichés
+        collect_messages([])
+        details = semantic_api.get_papers_batch(ids, fields=semantic_api.PREFETCH_FIELDS, fallback=False)
+        references.update(
+            (d['paperId'], [r['paperId'] for r in d.get('references') or [] if r.get('paperId')])
+            for d in details
+        )
+    
+    if ids:
+        threading.Thread(target=prefetch, daemon=True).start()
+    return references
+
+
+def follow_pipeline(job: Dict, semantic_api: SemanticScholarAPI):
+    """
+    Affiche l'avancement du pipeline au fil des événements, résumés inclus.
+    Une fois terminé, publie les articles dans st.session_state, lance le
+    préchargement des références et relance l'affichage.
+    """
+    placeholder = st.empty()
+    while True:
+        with placeholder.container():
+            if job['status']:
+                st.info(job['status'])
+            if job['keywords']:
+                st.info(f"**Mots-clés identifiés:** {', '.join(job['keywords'])}")
+            papers = job['papers']
+            if papers:
+                st.success(f"✅ {len(papers)} articles trouvés !")
+                st.progress(
+                    job['summarized'] / len(papers),
+                    text=f"Résumés générés : {job['summarized']}/{len(papers)}"
+                )
+                # Résultats partiels : les résumés s'affichent dès qu'ils sont prêts
+                for paper in papers:
+                    summary = paper.get('summary')
+                    if summary:
+                        st.markdown(f"**📄 {paper.get('title', 'Sans titre')}** ({paper.get('year', 'N/A')})")
+                        st.write(summary)
+            show_messages(job['messages'])
         
-        return review
+        if job['done']:
+            break
+        try:
+            job['events'].get(timeout=1.0)
+        except queue.Empty:
+            pass
+        # Regroupe les événements arrivés entre-temps en un seul rafraîchissement
+        while not job['events'].empty():
+            job['events'].get_nowait()
+    
+    placeholder.empty()
+    st.session_state.pipeline = None
+    # Les messages restent affichés après le rerun (voir main)
+    messages = list(job['messages'])
+    if job['error']:
+        messages.append(("error", job['error']))
+    st.session_state.pipeline_messages = messages
+    if not job['error'] and not job['cancel'].is_set():
+        store_papers(job['papers'])
+        st.session_state.references = start_prefetch(semantic_api, job['papers'])
+        st.session_state.search_done = True
+        st.rerun()
+
+
+# ============================================================================
+# RESSOURCES PARTAGÉES ENTRE LES RERUNS
+# ============================================================================
+# st.cache_resource renvoie le même objet à chaque rerun (sans copie) pour des
+# arguments identiques : le modèle Gemini et le pool HTTPS ne sont créés
+# qu'une fois. Changer de clé API ou de modèle crée de nouvelles instances,
+# en nombre borné (resource_max_entries) et libérées après resource_ttl sans
+# usage. Les caches de réponses (connexion SQLite, cache sémantique) sont
+# uniques pour le processus et partagés par tous les clients LLM.
+
+@st.cache_resource(show_spinner=False)
+def get_llm_cache() -> CacheLayer:
+    config = Config()
+    return CacheLayer(
+        LLMCache(
+            config.llm_cache_path,
+            ttl=config.llm_cache_ttl,
+            max_entries=config.llm_cache_max_entries
+        ),
+        SemanticCache(
+            threshold=config.semantic_cache_threshold,
+            min_coverage=config.semantic_cache_min_coverage
+        )
+    )
+
+
+@st.cache_resource(show_spinner=False, max_entries=Config.resource_max_entries, ttl=Config.resource_ttl)
+def get_llm(api_key: str, model_name: str) -> LLMProvider:
+    return LLMProvider(
+        api_key=api_key,
+        model_name=model_name,
+        requests_per_second=Config().llm_requests_per_second,
+        cache=get_llm_cache()
+    )
+
+
+@st.cache_resource(show_spinner=False, max_entries=Config.resource_max_entries, ttl=Config.resource_ttl)
+def get_semantic_api(api_key: Optional[str]) -> SemanticScholarAPI:
+    return SemanticScholarAPI(Config(), api_key=api_key)
+
+
+@st.cache_resource(show_spinner=False, max_entries=Config.resource_max_entries, ttl=Config.resource_ttl)
+def get_review_generator(api_key: str, model_name: str) -> LiteratureReviewGenerator:
+    return LiteratureReviewGenerator(
+        get_llm(api_key, model_name),
+        max_papers_in_prompt=Config().max_papers_in_prompt
+    )
 
 
 # ============================================================================
@@ -474,17 +1380,22 @@ def main():
     # INITIALISATION
     # ========================================================================
     config = Config(max_articles=max_articles)
-    llm = LLMProvider(api_key=api_key, model_name=model_choice)
-    semantic_api = SemanticScholarAPI(config, api_key=ss_api_key if ss_api_key else None)
-    review_generator = LiteratureReviewGenerator(llm)
+    semantic_api = get_semantic_api(ss_api_key if ss_api_key else None)
+    review_generator = get_review_generator(api_key, model_choice)
     
     # Initialise l'état de session
     if 'papers' not in st.session_state:
-        st.session_state.papers = []
+        store_papers([])
     if 'question' not in st.session_state:
         st.session_state.question = ""
     if 'search_done' not in st.session_state:
         st.session_state.search_done = False
+    if 'pipeline' not in st.session_state:
+        st.session_state.pipeline = None
+    if 'pipeline_messages' not in st.session_state:
+        st.session_state.pipeline_messages = []
+    if 'references' not in st.session_state:
+        st.session_state.references = {}
     
     # ========================================================================
     # ÉTAPE 1: Question de l'utilisateur
@@ -501,48 +1412,36 @@ def main():
     with col1:
         search_button = st.button("🔍 Rechercher", type="primary")
     with col2:
-        if st.session_state.search_done:
+        if st.session_state.search_done or st.session_state.pipeline:
             if st.button("🔄 Nouvelle recherche"):
-                st.session_state.papers = []
+                if st.session_state.pipeline:
+                    st.session_state.pipeline['cancel'].set()
+                    st.session_state.pipeline = None
+                store_papers([])
                 st.session_state.search_done = False
+                st.session_state.pipeline_messages = []
+                st.session_state.references = {}
                 st.rerun()
     
     # ========================================================================
     # ÉTAPE 2: Recherche et affichage des articles
     # ========================================================================
     if search_button and question:
+        # Une nouvelle recherche remplace celle éventuellement en cours
+        if st.session_state.pipeline:
+            st.session_state.pipeline['cancel'].set()
         st.session_state.question = question
-        
-        with st.spinner("🔎 Extraction des mots-clés..."):
-            keywords = semantic_api.extract_keywords(question, llm)
-            st.info(f"**Mots-clés identifiés:** {', '.join(keywords)}")
-        
-        with st.spinner("📖 Recherche d'articles sur Semantic Scholar..."):
-            # Recherche avec les mots-clés combinés
-            query = ' '.join(keywords)
-            papers = semantic_api.search_papers(query, limit=max_articles)
-            
-            if not papers:
-                st.error("Aucun article trouvé. Essayez de reformuler votre question.")
-                return
-            
-            st.success(f"✅ {len(papers)} articles trouvés !")
-        
-        # Génère les résumés
-        with st.spinner("✍️ Génération des résumés..."):
-            for i, paper in enumerate(papers):
-                # Ajoute un délai pour respecter les limites de taux de l'API
-                if i > 0:
-                    time.sleep(1.0)  # Pause de 1 seconde entre chaque résumé
-                
-                try:
-                    paper['summary'] = review_generator.summarize_paper(paper, semantic_api)
-                except Exception as e:
-                    st.warning(f"⚠️ Erreur lors de la génération du résumé pour '{paper.get('title', 'Article')[:50]}...': {str(e)}")
-                    paper['summary'] = f"Erreur de génération. Consultez l'article: {paper.get('url', 'URL non disponible')}"
-        
-        st.session_state.papers = papers
-        st.session_state.search_done = True
+        store_papers([])
+        st.session_state.search_done = False
+        st.session_state.pipeline_messages = []
+        st.session_state.references = {}
+        st.session_state.pipeline = start_pipeline(question, config, semantic_api, review_generator)
+    
+    # Le pipeline tourne en arrière-plan : un rerun (clic sur un widget) se
+    # reconnecte simplement à son avancement au lieu de tout relancer
+    if st.session_state.pipeline:
+        follow_pipeline(st.session_state.pipeline, semantic_api)
+    show_messages(st.session_state.pipeline_messages)
     
     # ========================================================================
     # AFFICHAGE DES RÉSULTATS
@@ -555,9 +1454,11 @@ def main():
         st.subheader("Sélectionnez les articles à inclure dans l'état de l'art")
         
         selected_papers = []
+        selected_author_strs = []
         for i, paper in enumerate(st.session_state.papers):
+            author_names = st.session_state.author_strs[i]
             with st.expander(
-                f"📄 {paper.get('title', 'Sans titre')} ({paper.get('year', 'N/A')})",
+                f"📄 {st.session_state.titles[i]} ({st.session_state.years[i]})",
                 expanded=(i < 3)  # Les 3 premiers sont ouverts par défaut
             ):
                 # Checkbox de sélection
@@ -568,15 +1469,10 @@ def main():
                 )
                 
                 # Informations sur l'article
-                authors = paper.get('authors', [])
-                author_names = ', '.join([a.get('name', '') for a in authors[:3]])
-                if len(authors) > 3:
-                    author_names += f" et al."
-                
                 col1, col2 = st.columns(2)
                 with col1:
                     st.markdown(f"**Auteurs:** {author_names}")
-                    st.markdown(f"**Année:** {paper.get('year', 'N/A')}")
+                    st.markdown(f"**Année:** {st.session_state.years[i]}")
                 with col2:
                     st.markdown(f"**Citations:** {paper.get('citationCount', 0)}")
                     if paper.get('url'):
@@ -587,6 +1483,7 @@ def main():
                 
                 if is_selected:
                     selected_papers.append(paper)
+                    selected_author_strs.append(author_names)
         
         st.markdown(f"**{len(selected_papers)} articles sélectionnés**")
         
@@ -599,33 +1496,32 @@ def main():
             if len(selected_papers) == 0:
                 st.warning("⚠️ Veuillez sélectionner au moins un article")
             else:
-                with st.spinner("✨ Génération de l'état de l'art en cours... (cela peut prendre 1-2 minutes)"):
-                    try:
-                        review = review_generator.generate_full_review(
-                            selected_papers,
-                            st.session_state.question
-                        )
+                try:
+                    # Affichage de l'état de l'art au fil de sa génération
+                    st.markdown("---")
+                    st.markdown("## 📑 État de l'art")
+                    review = st.write_stream(review_generator.stream_full_review(
+                        selected_papers,
+                        st.session_state.question,
+                        selected_author_strs,
+                        st.session_state.references
+                    ))
+                    
+                    if review and review.strip() != "":
+                        st.success("✅ État de l'art généré avec succès !")
                         
-                        if review and review.strip() != "":
-                            st.success("✅ État de l'art généré avec succès !")
-                            
-                            # Affichage de l'état de l'art
-                            st.markdown("---")
-                            st.markdown("## 📑 État de l'art")
-                            st.markdown(review)
-                            
-                            # Bouton de téléchargement
-                            st.download_button(
-                                label="💾 Télécharger l'état de l'art",
-                                data=review,
-                                file_name="etat_de_lart.txt",
-                                mime="text/plain"
-                            )
-                        else:
-                            st.error("❌ La génération a échoué. Essayez avec un autre modèle LLM.")
-                    except Exception as e:
-                        st.error(f"❌ Erreur lors de la génération : {str(e)}")
-                        st.info("💡 Essayez de sélectionner moins d'articles ou changez de modèle LLM")
+                        # Bouton de téléchargement
+                        st.download_button(
+                            label="💾 Télécharger l'état de l'art",
+                            data=review,
+                            file_name="etat_de_lart.txt",
+                            mime="text/plain"
+                        )
+                    else:
+                        st.error("❌ La génération a échoué. Essayez avec un autre modèle LLM.")
+                except Exception as e:
+                    st.error(f"❌ Erreur lors de la génération : {str(e)}")
+                    st.info("💡 Essayez de sélectionner moins d'articles ou changez de modèle LLM")
 
 
 if __name__ == "__main__":
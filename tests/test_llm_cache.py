@@ -0,0 +1,125 @@
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import zstandard  # noqa: E402
+
+from Etat_de_l_art import LLMCache  # noqa: E402
+
+WORDS = ("l article propose une méthode d apprentissage par renforcement pour la robotique "
+         "avec des résultats significatifs sur plusieurs benchmarks").split()
+
+
+def fill(cache, prefix, count, seed):
+    rng = random.Random(seed)
+    texts = {}
+    for i in range(count):
+        texts[f"{prefix}{i}"] = ' '.join(rng.choice(WORDS) for _ in range(200))
+        cache.set(f"{prefix}{i}", texts[f"{prefix}{i}"])
+    return texts
+
+
+def test_round_trip(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.sqlite"))
+    cache.set("k", "réponse é")
+    assert cache.get("k") == "réponse é"
+    assert cache.get("absent") is None
+
+
+class Clock:
+    """Horloge manuelle, à la seconde comme les colonnes created_at et accessed_at"""
+    
+    def __init__(self, now=1_000_000):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    cache = LLMCache(str(tmp_path / "llm.sqlite"), ttl=60)
+    cache.set("k", "réponse")
+    clock.now += 60
+    assert cache.get("k") == "réponse"
+    clock.now += 1
+    assert cache.get("k") is None
+    # L'entrée expirée est supprimée
+    assert cache.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    cache = LLMCache(str(tmp_path / "llm.sqlite"), max_entries=3)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+        clock.now += 1
+    # La lecture rend "a" plus récent que "b" et "c"
+    assert cache.get("a") == "a"
+    clock.now += 1
+    cache.set("d", "d")
+    assert cache.get("b") is None
+    assert [cache.get(k) for k in ("a", "c", "d")] == ["a", "c", "d"]
+
+
+def test_eviction_ties_keep_the_newest_entry(tmp_path, monkeypatch):
+    monkeypatch.setattr(time, "time", Clock())
+    cache = LLMCache(str(tmp_path / "llm.sqlite"), max_entries=2)
+    cache.set("a", "a")
+    cache.set("b", "b")
+    with cache.lock, cache.conn:
+        # Même accessed_at : created_at départage, l'entrée la plus ancienne part
+        cache.conn.execute("UPDATE cache SET created_at = created_at - 1 WHERE key = 'a'")
+    cache.set("c", "c")
+    assert cache.get("a") is None
+    assert [cache.get(k) for k in ("b", "c")] == ["b", "c"]
+
+
+def test_dictionary_is_trained_and_survives_reopen(tmp_path):
+    path = tmp_path / "llm.sqlite"
+    cache = LLMCache(str(path))
+    texts = fill(cache, "a", LLMCache.DICT_SAMPLES + 20, seed=1)
+    assert cache.dict_trained
+    reopened = LLMCache(str(path))
+    assert all(reopened.get(k) == v for k, v in texts.items())
+
+
+def test_frames_from_several_dictionaries_stay_readable(tmp_path):
+    path = tmp_path / "llm.sqlite"
+    first = LLMCache(str(path))
+    texts = fill(first, "a", LLMCache.DICT_SAMPLES + 5, seed=1)
+    # Un autre processus enregistre plus tard un dictionnaire différent
+    rng = random.Random(3)
+    samples = [' '.join(rng.choice(WORDS[::-1]) for _ in range(150)).encode() for _ in range(200)]
+    other = zstandard.train_dictionary(LLMCache.DICT_SIZE, samples)
+    with first.lock, first.conn:
+        first.conn.execute(
+            "INSERT INTO dictionaries VALUES (?, ?, strftime('%s','now') + 10)", (other.dict_id(), other.as_bytes())
+        )
+    second = LLMCache(str(path))
+    texts.update(fill(second, "b", 5, seed=2))
+    reopened = LLMCache(str(path))
+    frame = reopened.conn.execute("SELECT response FROM cache WHERE key = 'b0'").fetchone()[0]
+    assert zstandard.get_frame_parameters(frame).dict_id == other.dict_id()
+    assert all(reopened.get(k) == v for k, v in texts.items())
+
+
+def test_missing_dictionary_is_a_cache_miss(tmp_path):
+    path = tmp_path / "llm.sqlite"
+    cache = LLMCache(str(path))
+    fill(cache, "a", LLMCache.DICT_SAMPLES, seed=1)
+    cache.set("after", "entrée compressée avec le dictionnaire")
+    conn = sqlite3.connect(str(path))
+    conn.execute("DELETE FROM dictionaries")
+    conn.commit()
+    conn.close()
+    reopened = LLMCache(str(path))
+    assert reopened.get("after") is None
+    # La ligne illisible est supprimée
+    assert reopened.conn.execute("SELECT COUNT(*) FROM cache WHERE key = 'after'").fetchone()[0] == 0
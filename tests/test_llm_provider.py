@@ -0,0 +1,62 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest  # noqa: E402
+
+from Etat_de_l_art import LLMProvider  # noqa: E402
+
+CALLERS = 8
+
+
+def run_concurrently(provider, call_model):
+    """Lance CALLERS appels identiques ; le premier appel au modèle est bloqué jusqu'à leur arrivée"""
+    calls = []
+    entered = threading.Event()
+    release = threading.Event()
+    
+    def blocking_call(prompt):
+        calls.append(prompt)
+        entered.set()
+        release.wait(5)
+        return call_model(prompt)
+    
+    provider._call_model = blocking_call
+    barrier = threading.Barrier(CALLERS)
+    
+    def caller():
+        barrier.wait()
+        return provider.generate("même prompt")
+    
+    with ThreadPoolExecutor(max_workers=CALLERS) as executor:
+        futures = [executor.submit(caller) for _ in range(CALLERS)]
+        assert entered.wait(5)
+        # Laisse les autres appels rejoindre l'appel en cours
+        time.sleep(0.2)
+        release.set()
+    return calls, futures
+
+
+def test_identical_concurrent_calls_share_one_model_call():
+    provider = LLMProvider("cle", provider="test")
+    calls, futures = run_concurrently(provider, lambda prompt: "réponse")
+    assert len(calls) == 1
+    assert [f.result() for f in futures] == ["réponse"] * CALLERS
+    assert provider.in_flight == {}
+
+
+def test_owner_exception_reaches_waiters():
+    def failing(prompt):
+        raise RuntimeError("quota dépassé")
+    
+    provider = LLMProvider("cle", provider="test")
+    calls, futures = run_concurrently(provider, failing)
+    assert len(calls) == 1
+    for future in futures:
+        with pytest.raises(RuntimeError, match="quota dépassé"):
+            future.result()
+    assert provider.in_flight == {}
@@ -0,0 +1,75 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Etat_de_l_art import SemanticCache  # noqa: E402
+
+NS = "gemini:test"
+
+
+def make_cache(*texts):
+    cache = SemanticCache()
+    for i, text in enumerate(texts):
+        cache.set(NS, text, f"reponse-{i}")
+    return cache
+
+
+def test_reformulation_is_a_hit():
+    cache = make_cache("Quelles sont les méthodes d'apprentissage par renforcement pour la robotique ?")
+    assert cache.get(NS, "Quelles méthodes d'apprentissage par renforcement pour la robotique") == "reponse-0"
+
+
+def test_accents_and_case_are_ignored():
+    cache = make_cache("Méthodes d'apprentissage par renforcement en robotique")
+    assert cache.get(NS, "methodes d'apprentissage par RENFORCEMENT en robotique") == "reponse-0"
+
+
+def test_query_with_unseen_words_is_a_miss():
+    # Les mots absents du corpus ne doivent pas être ignorés par la vectorisation
+    cache = make_cache("Quelles sont les méthodes d'apprentissage pour la robotique ?")
+    query = ("Quelles sont les méthodes d'apprentissage par renforcement profond "
+             "pour la vision par ordinateur en robotique médicale ?")
+    assert cache.get(NS, query) is None
+
+
+def test_query_covering_part_of_stored_text_is_a_miss():
+    cache = make_cache("Apprentissage par renforcement profond pour la robotique médicale")
+    assert cache.get(NS, "robotique médicale") is None
+
+
+def test_one_extra_keyword_is_a_miss():
+    cache = make_cache("graph neural networks for molecule property prediction")
+    assert cache.get(NS, "graph neural networks for molecule property prediction benchmarks") is None
+
+
+def test_stop_words_alone_do_not_match():
+    cache = make_cache("the methods of the robots")
+    assert cache.get(NS, "the methods of the planets") is None
+    assert cache.get(NS, "de la pour les") is None
+
+
+def test_picks_the_matching_entry_among_several():
+    cache = make_cache(
+        "Transformers for image segmentation",
+        "Reinforcement learning methods for robotics",
+    )
+    assert cache.get(NS, "reinforcement learning methods for robotics") == "reponse-1"
+
+
+def test_namespaces_are_isolated():
+    cache = make_cache("Reinforcement learning methods for robotics")
+    assert cache.get("gemini:other", "Reinforcement learning methods for robotics") is None
+
+
+def test_oldest_entries_are_evicted():
+    cache = SemanticCache(max_entries=2)
+    for i, text in enumerate([
+        "Transformers for image segmentation",
+        "Reinforcement learning methods for robotics",
+        "Graph neural networks for molecule property prediction",
+    ]):
+        cache.set(NS, text, f"reponse-{i}")
+    assert cache.get(NS, "transformers for image segmentation") is None
+    assert cache.get(NS, "reinforcement learning methods for robotics") == "reponse-1"
+    assert cache.get(NS, "graph neural networks for molecule property prediction") == "reponse-2"